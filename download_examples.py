@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Download a set of example modules into the current directory for testing:
+the all-time favourites top 40 from The Mod Archive, plus a few extras.
+
+All downloads run concurrently (with a polite parallelism limit) over a
+single shared HTTP session, so the total wall time is bounded by the
+slowest transfer instead of the sum of all round-trips.
+"""
+# SPDX-FileCopyrightText: 2024 Martin J. Fiedler <keyj@emphy.de>
+# SPDX-License-Identifier: MIT
+
+import asyncio
+import os
+import re
+import shutil
+import sys
+import tempfile
+import urllib.parse
+import zipfile
+
+import aiohttp
+
+CHART_URL = "https://modarchive.org/index.php?request=view_top_favourites"
+CHART_LINK_RE = re.compile(r'href="(https://api\.modarchive\.org/downloads\.php\?moduleid=\d+#[^"]+)"')
+CDISP_NAME_RE = re.compile(r'filename="?([^";]+)')
+MAX_PARALLEL_DOWNLOADS = 8
+CHUNK_SIZE = 65536
+
+EXTRA_DOWNLOADS_RAW = (
+    # direct URLs of single module files to download in addition to the chart;
+    # a '#fragment' in the URL overrides the target file name
+)
+
+EXTRA_DOWNLOADS_ZIP = (
+    # (url, member) pairs: download a .zip file and extract a single module
+    # ("member" may be any case-insensitive substring of the member's name)
+)
+
+
+class DownloadHelper:
+    def __init__(self, session: aiohttp.ClientSession):
+        self.session = session
+        self.semaphore = asyncio.Semaphore(MAX_PARALLEL_DOWNLOADS)
+        # scan the target directory once instead of stat()ing per file;
+        # DirEntry.name needs no extra syscall
+        self.existing = {e.name for e in os.scandir(".")}
+
+    def have(self, name):
+        if name in self.existing:
+            print("already downloaded:", name)
+            return True
+        return False
+
+    def finish(self, partname, name):
+        # the download went to a .part file; move it into place atomically,
+        # so an interrupted transfer can never masquerade as a finished one
+        os.replace(partname, name)
+        self.existing.add(name)
+
+    @staticmethod
+    def target_name(name, rank=0):
+        name = urllib.parse.unquote(name.rpartition('/')[2].strip())
+        return f"{rank:02d}_{name}" if rank else name
+
+    @staticmethod
+    def response_name(resp, url):
+        m = CDISP_NAME_RE.search(resp.headers.get('Content-Disposition', ""))
+        return m.group(1) if m else urllib.parse.urlsplit(url).path
+
+    async def download(self, url, rank=0):
+        url, _, fragment = url.partition('#')
+        name = self.target_name(fragment, rank) if fragment else None
+        if name and self.have(name):
+            return  # no HTTP needed at all
+        async with self.semaphore:
+            if not name:
+                # learn the final filename from a cheap HEAD request first,
+                # so a re-run doesn't fetch bodies it already has on disk
+                async with self.session.head(url, allow_redirects=True) as resp:
+                    if resp.status < 400:
+                        name = self.target_name(self.response_name(resp, url), rank)
+                if name and self.have(name):
+                    return
+            async with self.session.get(url) as resp:
+                resp.raise_for_status()
+                if not name:
+                    name = self.target_name(self.response_name(resp, url), rank)
+                    if self.have(name):
+                        return
+                print("downloading:", name)
+                partname = name + ".part"
+                with open(partname, 'wb') as out:
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        out.write(chunk)
+                self.finish(partname, name)
+
+    async def download_zip(self, url, member, rank=0):
+        # spool the archive to a temporary file instead of memory: some of the
+        # scene.org packs are far bigger than the single module we want out of
+        # them, and ZipFile only needs a seekable file, not the whole buffer
+        with tempfile.TemporaryFile(suffix=".zip") as spool:
+            async with self.semaphore:
+                async with self.session.get(url) as resp:
+                    resp.raise_for_status()
+                    async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                        spool.write(chunk)
+            with zipfile.ZipFile(spool) as z:
+                for info in z.infolist():
+                    if member.lower() in info.filename.lower():
+                        name = self.target_name(info.filename, rank)
+                        if self.have(name):
+                            return
+                        print("extracting:", name)
+                        partname = name + ".part"
+                        with z.open(info) as src, open(partname, 'wb') as out:
+                            shutil.copyfileobj(src, out, CHUNK_SIZE)
+                        self.finish(partname, name)
+                        return
+        print(f"ERROR: no member matching '{member}' in {url}", file=sys.stderr)
+
+
+async def main():
+    # a single session with a keep-alive connection pool: nearly everything
+    # comes from the same two or three hosts, so reusing connections saves
+    # one TCP+TLS handshake per file
+    connector = aiohttp.TCPConnector(limit=MAX_PARALLEL_DOWNLOADS,
+                                     limit_per_host=MAX_PARALLEL_DOWNLOADS)
+    async with aiohttp.ClientSession(connector=connector,
+                                     headers={'User-Agent': "TrackMeister/download_examples"}) as session:
+        dl = DownloadHelper(session)
+
+        print("fetching chart:", CHART_URL)
+        async with session.get(CHART_URL) as resp:
+            resp.raise_for_status()
+            html = await resp.text()
+        urls = CHART_LINK_RE.findall(html)
+
+        tasks = [dl.download(url, rank) for rank, url in enumerate(dict.fromkeys(urls), 1)]
+        tasks += [dl.download(url) for url in EXTRA_DOWNLOADS_RAW]
+        tasks += [dl.download_zip(url, member) for url, member in EXTRA_DOWNLOADS_ZIP]
+        errors = [e for e in await asyncio.gather(*tasks, return_exceptions=True) if e]
+        for e in errors:
+            print("ERROR:", e, file=sys.stderr)
+        return not errors
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(main()) else 1)
@@ -24,18 +24,25 @@ fi
 
 [ ! -r $FONT_FILE ] && wget -O$FONT_FILE -nv $FONT_URL
 
-$ATLAS_GEN_BINARY \
-    -font $FONT_FILE -charset charset.txt \
-    -type msdf \
-    -format png -imageout font.png \
-    -json font.json \
-    -size 32 -pxrange 2 \
-    -potr
-
-if which optipng &>/dev/null ; then
-    optipng -nx -o7 -strip all font.png
-elif which pngcrush &>/dev/null ; then
-    pngcrush -ow -brute -noreduce font.png
+# skip atlas generation and the (slow) PNG re-compression on repeat runs
+# if the outputs are already newer than the inputs
+if [ font.png -nt $FONT_FILE ] && [ font.png -nt charset.txt ] \
+&& [ font.json -nt $FONT_FILE ] && [ font.json -nt charset.txt ] ; then
+    echo "font.png and font.json are up to date"
+else
+    $ATLAS_GEN_BINARY \
+        -font $FONT_FILE -charset charset.txt \
+        -type msdf \
+        -format png -imageout font.png \
+        -json font.json \
+        -size 32 -pxrange 2 \
+        -potr
+
+    if which optipng &>/dev/null ; then
+        optipng -nx -o7 -strip all font.png
+    elif which pngcrush &>/dev/null ; then
+        pngcrush -ow -brute -noreduce font.png
+    fi
 fi
 
 python3 convert_font.py
@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 # SPDX-FileCopyrightText: 2023 Martin J. Fiedler <keyj@emphy.de>
 # SPDX-License-Identifier: MIT
+import bisect
 import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from emit_c_array import hex_array_body
 
 if __name__ == "__main__":
     with open("font.json") as f:
@@ -23,47 +29,49 @@ if __name__ == "__main__":
 
     order = sorted(glyphs)
     for cp in (0xFFFD, ord('?')):
-        if cp in order:
-            fgi = order.index(cp)
+        i = bisect.bisect_left(order, cp)
+        if (i < len(order)) and (order[i] == cp):
+            fgi = i
             break
 
-    with open("font_data.cpp", 'w') as f:
-        f.write("// This file has been generated automatically, DO NOT EDIT!\n\n")
-        f.write('#include "font_data.h"\n\n')
-        f.write("namespace FontData {\n\n")
-        f.write(f"const int TexDataSize        = {len(png):6};\n")
-        f.write(f"const int NumGlyphs          = {len(glyphs):6};\n")
-        f.write(f"const int FallbackGlyphIndex = {fgi:6};\n")
-        f.write(f"const float Baseline         = {mbase:.6f}f;\n\n")
+    # collect the generated code in a list and write it in one go;
+    # thousands of tiny f.write() calls are surprisingly expensive
+    out = []
+    out.append("// This file has been generated automatically, DO NOT EDIT!\n\n")
+    out.append('#include "font_data.h"\n\n')
+    out.append("namespace FontData {\n\n")
+    out.append(f"const int TexDataSize        = {len(png):6};\n")
+    out.append(f"const int NumGlyphs          = {len(glyphs):6};\n")
+    out.append(f"const int FallbackGlyphIndex = {fgi:6};\n")
+    out.append(f"const float Baseline         = {mbase:.6f}f;\n\n")
 
-        f.write("const Glyph GlyphData[] = {\n")
-        for cp in order:
-            g = glyphs[cp]
-            adv = g['advance'] * mscale
-            p = g.get('planeBounds')
-            if p:
-                px0 =         p['left']   * mscale
-                py0 = mbase - p['top']    * mscale
-                px1 =         p['right']  * mscale
-                py1 = mbase - p['bottom'] * mscale
-            else:
-                px0, py0, px1, py1 = 4*[0]
-            t = g.get('atlasBounds')
-            if t:
-                tx0 =     t['left']
-                ty0 = h - t['top']
-                tx1 =     t['right']
-                ty1 = h - t['bottom']
-            else:
-                tx0, ty0, tx1, ty1 = 4*[0]
-            space = "false," if (t and p) else "true, "
-            f.write(f"    {{ 0x{cp:08X}, {adv:8.6f}f, {space} {{{px0:9.6f}f,{py0:9.6f}f,{px1:9.6f}f,{py1:9.6f}f }}, {{{tx0:6.1f}f/{w},{ty0:6.1f}f/{h},{tx1:6.1f}f/{w},{ty1:6.1f}f/{h} }} }},\n")
-        f.write("};\n\n")
+    out.append("const Glyph GlyphData[] = {\n")
+    for cp in order:
+        g = glyphs[cp]
+        adv = g['advance'] * mscale
+        p = g.get('planeBounds')
+        if p:
+            px0 =         p['left']   * mscale
+            py0 = mbase - p['top']    * mscale
+            px1 =         p['right']  * mscale
+            py1 = mbase - p['bottom'] * mscale
+        else:
+            px0, py0, px1, py1 = 4*[0]
+        t = g.get('atlasBounds')
+        if t:
+            tx0 =     t['left']
+            ty0 = h - t['top']
+            tx1 =     t['right']
+            ty1 = h - t['bottom']
+        else:
+            tx0, ty0, tx1, ty1 = 4*[0]
+        space = "false," if (t and p) else "true, "
+        out.append(f"    {{ 0x{cp:08X}, {adv:8.6f}f, {space} {{{px0:9.6f}f,{py0:9.6f}f,{px1:9.6f}f,{py1:9.6f}f }}, {{{tx0:6.1f}f/{w},{ty0:6.1f}f/{h},{tx1:6.1f}f/{w},{ty1:6.1f}f/{h} }} }},\n")
+    out.append("};\n\n")
 
-        f.write("const uint8_t TexData[] = {")
-        comma = ""
-        BPL = (254 - 4) // 5
-        for pos in range(0, len(png), BPL):
-            f.write(comma + "\n    " + ','.join(f"0x{b:02X}" for b in png[pos : pos + BPL]))
-            comma = ","
-        f.write("\n};\n\n} // namespace FontData\n")
+    out.append("const uint8_t TexData[] = {")
+    out.append(hex_array_body(png))
+    out.append("\n};\n\n} // namespace FontData\n")
+
+    with open("font_data.cpp", 'w') as f:
+        f.write(''.join(out))
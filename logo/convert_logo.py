@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 # SPDX-FileCopyrightText: 2023 Martin J. Fiedler <keyj@emphy.de>
 # SPDX-License-Identifier: MIT
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tools'))
+from emit_c_array import hex_array_body
 
 if __name__ == "__main__":
     with open("logo.png", 'rb') as f:
@@ -10,9 +15,5 @@ if __name__ == "__main__":
         f.write("// This file has been generated automatically, DO NOT EDIT!\n\n")
         f.write(f'extern "C" const int LogoDataSize = {len(png)};\n')
         f.write('extern "C" const unsigned char LogoData[] = {')
-        comma = ""
-        BPL = (254 - 4) // 5
-        for pos in range(0, len(png), BPL):
-            f.write(comma + "\n    " + ','.join(f"0x{b:02X}" for b in png[pos : pos + BPL]))
-            comma = ","
+        f.write(hex_array_body(png))
         f.write('\n};\n')
@@ -1,10 +1,28 @@
 #!/usr/bin/env python3
-import io
 import re
 import sys
 
+RE_COMMENT    = re.compile(r'//!\s?(.*)')
+RE_ENUM_START = re.compile(r'enum class (\w+) {')
+RE_ENUM_ITEM  = re.compile(r'(\w+)(\s*=\s*\d+)?,?')
+RE_ITEM = re.compile(r'''
+    (?P<type>   [a-zA-Z0-9_:]+) \s*
+    (?P<field>  \w+) \s*
+    ( = \s* (?P<default> .*?) )? ;
+    \s* //!< \s*
+    (?P<comment> .*)
+''', flags=re.X)
+
+SCALAR_TYPES = {'bool', 'int', 'float', 'uint32_t', 'std::string'}
+
+# ConfigItem::format*/parse* suffix for each scalar type
+# (std::string is special-cased, enums use formatEnum/parseEnum)
+FORMAT_SUFFIX = {'bool': 'Bool', 'int': 'Int', 'float': 'Float', 'uint32_t': 'Color'}
+
+RE_UPPER = re.compile('([A-Z])')
+
 def camelCase_to_space_case(x):
-    words = ''.join(((' ' + c.lower()) if c.isupper() else c) for c in x).split()
+    words = RE_UPPER.sub(r' \1', x).lower().split()
     return ' '.join((word.upper() if (len(word) < 2) else word) for word in words)
 
 if __name__ == "__main__":
@@ -26,131 +44,127 @@ if __name__ == "__main__":
     ]
     name_maxlen = 0
 
+    # read and decode the whole file once; splitlines is a single C pass
     with open(infile, 'r') as f:
-        in_enum, in_config = None, False
-        lineno = 0
-        comment = []
-        for line in f:
-            lineno += 1
-            line = line.strip()
-
-            # empty line -> clear comment block
-            if not line:
-                comment = []
-
-            # comment
-            m = re.match(r'//!\s?(.*)', line)
-            if m:
-                c = m.group(1)
-                if not c.lower().startswith("in code,"):
-                    comment.append('; ' + c)
-                continue
-
-            # start of enum
-            m = re.match(r'enum class (\w+) {', line)
-            if m:
-                in_enum = m.group(1)
-                enums[in_enum] = []
-                continue
-
-            # enum item
-            m = in_enum and re.match(r'(\w+)(\s*=\s*\d+)?,?', line)
-            if m:
-                enums[in_enum].append(m.group(1))
-                continue
-
-            # start of config structure
-            if line.startswith('struct Config {'):
-                in_config = True
-                new_section = True
-                intro += comment
-                continue
-
-            # empty line inside config structure
-            if in_config and not(line):
-                new_section = True
-                continue
-
-            # config item
-            m = in_config and re.match(r'''
-                (?P<type>   [a-zA-Z0-9_:]+) \s*
-                (?P<field>  \w+) \s*
-                ( = \s* (?P<default> .*?) )? ;
-                \s* //!< \s*
-                (?P<comment> .*)
-            ''', line, flags=re.X)
-            if m:
-                type = m.group('type')
-                field = m.group('field')
-                name = camelCase_to_space_case(field)
-                name_maxlen = max(name_maxlen, len(name))
-                if not(type in {'bool', 'int', 'float', 'uint32_t', 'std::string'}) and not(type in enums):
-                    print(f"{infile}:{lineno}: invalid type '{type}'", file=sys.stderr)
-                else:
-                    fields.append((new_section, type, field, name, m.group('comment').strip()))
-                new_section = False
-
-            # end of struct or enum
-            if line.startswith('};'):
-                in_enum, in_config = None, False
-                continue
-
-    # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
-
-    with io.StringIO() as f:
-        f.write('// This file has been generated by generate_config_data.py.\n')
-        f.write('// DO NOT EDIT! Changes will be overwritten without asking.\n\n')
-        f.write('#include <cstdint>\n\n')
-        f.write('#include "config.h"\n#include "config_item.h"\n')
-
-        # write string<->enum mapping tables
-        for enum, items in sorted(enums.items()):
-            f.write(f'\nextern "C" const EnumItem e_{enum}[] = {{\n')
-            item_maxlen = max(map(len, items))
-            for item in items:
-                f.write('    { "' + (item + '",').ljust(item_maxlen + 2) + f' static_cast<int>({enum}::' + (item + ')').ljust(item_maxlen + 1) + ' },\n')
-            f.write('    { nullptr, 0 }\n};\n')
-
-        # write main config item table
-        f.write('\nconst ConfigItem g_ConfigItems[] = { {\n')
-        first = True
-        for new_section, type, field, name, desc in fields:
-            if first: first = False
-            else: f.write('    }, {\n')
-
-            # add possible values to description
-            if type in enums:
-                desc += " [possible values: " + ", ".join(f"'{e}'" for e in enums[type]) + "]"
-
-            # write name and description
-            f.write(f'        {repr(new_section).lower()}, "{name.ljust(name_maxlen)}",\n')
-            desc = desc.replace('"', '\\"')
-            f.write(f'        "{desc}",\n')
-
-            # write getters and setters
-            if type in enums:
-                f.write(f'        [] (const Config& cfg) -> std::string {{ return ConfigItem::formatEnum(static_cast<int>(cfg.{field}), e_{type}); }},\n')
-                f.write(f'        [] (ConfigParserContext& ctx, Config& cfg, const char* s) {{ int value; if (ctx.checkParseResult(ConfigItem::parseEnum(value, s, e_{type}), s)) {{ cfg.{field} = static_cast<{type}>(value); }} }}\n')
-            elif type == 'std::string':
-                f.write(f'        [] (const Config& cfg) -> std::string {{ return cfg.{field}; }},\n')
-                f.write(f'        [] (ConfigParserContext& ctx, Config& cfg, const char* s) {{ (void)ctx; cfg.{field}.assign(s); }}\n')
+        lines = f.read().splitlines()
+
+    in_enum, in_config = None, False
+    comment = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+
+        # empty line -> clear comment block
+        if not line:
+            comment = []
+
+        # comment
+        m = RE_COMMENT.match(line)
+        if m:
+            c = m.group(1)
+            if not c.lower().startswith("in code,"):
+                comment.append('; ' + c)
+            continue
+
+        # start of enum
+        m = RE_ENUM_START.match(line)
+        if m:
+            in_enum = m.group(1)
+            enums[in_enum] = []
+            continue
+
+        # enum item
+        m = in_enum and RE_ENUM_ITEM.match(line)
+        if m:
+            enums[in_enum].append(m.group(1))
+            continue
+
+        # start of config structure
+        if line.startswith('struct Config {'):
+            in_config = True
+            new_section = True
+            intro += comment
+            continue
+
+        # empty line inside config structure
+        if in_config and not(line):
+            new_section = True
+            continue
+
+        # config item
+        m = in_config and RE_ITEM.match(line)
+        if m:
+            type = m.group('type')
+            field = m.group('field')
+            name = camelCase_to_space_case(field)
+            name_maxlen = max(name_maxlen, len(name))
+            if not(type in SCALAR_TYPES) and not(type in enums):
+                print(f"{infile}:{lineno}: invalid type '{type}'", file=sys.stderr)
             else:
-                type = { "uint32_t": "Color" }.get(type, type.title())
-                f.write(f'        [] (const Config& cfg) -> std::string {{ return ConfigItem::format{type}(cfg.{field}); }},\n')
-                f.write(f'        [] (ConfigParserContext& ctx, Config& cfg, const char* s) {{ ctx.checkParseResult(ConfigItem::parse{type}(cfg.{field}, s), s); }}\n')
+                fields.append((new_section, type, field, name, m.group('comment').strip()))
+            new_section = False
 
-        f.write('    },\n    { false, nullptr, nullptr, nullptr, nullptr }\n};\n')
+        # end of struct or enum
+        if line.startswith('};'):
+            in_enum, in_config = None, False
+            continue
 
-        f.write('\nconst char* g_DefaultConfigFileIntro =\n')
-        first = True
-        for line in intro:
-            f.write((not(first) and '"\n' or '') + '    "' + line.replace('"', '\\"') + '\\n')
-            first = False
-        f.write('";\n')
+    # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 
-        data = f.getvalue()
+    # collect the generated code in a list and join it once at the end;
+    # this avoids thousands of tiny StringIO writes
+    out = []
+    out.append('// This file has been generated by generate_config_data.py.\n')
+    out.append('// DO NOT EDIT! Changes will be overwritten without asking.\n\n')
+    out.append('#include <cstdint>\n\n')
+    out.append('#include "config.h"\n#include "config_item.h"\n')
+
+    # write string<->enum mapping tables
+    for enum, items in sorted(enums.items()):
+        out.append(f'\nextern "C" const EnumItem e_{enum}[] = {{\n')
+        item_maxlen = max(map(len, items))
+        for item in items:
+            out.append('    { "' + (item + '",').ljust(item_maxlen + 2) + f' static_cast<int>({enum}::' + (item + ')').ljust(item_maxlen + 1) + ' },\n')
+        out.append('    { nullptr, 0 }\n};\n')
+
+    # write main config item table
+    out.append('\nconst ConfigItem g_ConfigItems[] = { {\n')
+    first = True
+    for new_section, type, field, name, desc in fields:
+        if first: first = False
+        else: out.append('    }, {\n')
+
+        # add possible values to description
+        if type in enums:
+            desc += " [possible values: " + ", ".join(f"'{e}'" for e in enums[type]) + "]"
+
+        # write name and description
+        out.append(f'        {repr(new_section).lower()}, "{name.ljust(name_maxlen)}",\n')
+        desc = desc.replace('"', '\\"')
+        out.append(f'        "{desc}",\n')
+
+        # write getters and setters
+        if type in enums:
+            out.append(f'        [] (const Config& cfg) -> std::string {{ return ConfigItem::formatEnum(static_cast<int>(cfg.{field}), e_{type}); }},\n')
+            out.append(f'        [] (ConfigParserContext& ctx, Config& cfg, const char* s) {{ int value; if (ctx.checkParseResult(ConfigItem::parseEnum(value, s, e_{type}), s)) {{ cfg.{field} = static_cast<{type}>(value); }} }}\n')
+        elif type == 'std::string':
+            out.append(f'        [] (const Config& cfg) -> std::string {{ return cfg.{field}; }},\n')
+            out.append(f'        [] (ConfigParserContext& ctx, Config& cfg, const char* s) {{ (void)ctx; cfg.{field}.assign(s); }}\n')
+        else:
+            type = FORMAT_SUFFIX[type]
+            out.append(f'        [] (const Config& cfg) -> std::string {{ return ConfigItem::format{type}(cfg.{field}); }},\n')
+            out.append(f'        [] (ConfigParserContext& ctx, Config& cfg, const char* s) {{ ctx.checkParseResult(ConfigItem::parse{type}(cfg.{field}, s), s); }}\n')
+
+    out.append('    },\n    { false, nullptr, nullptr, nullptr, nullptr }\n};\n')
+
+    out.append('\nconst char* g_DefaultConfigFileIntro =\n')
+    out.append('"\n'.join('    "' + line.replace('"', '\\"') + '\\n' for line in intro))
+    out.append('";\n')
+
+    data = ''.join(out)
 
     # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # # #
 
-    with open(outfile, 'wb') as f:
-        f.write(data.encode('utf-8').replace(b'\r', b''))
+    # newline='\n' keeps CRs out of the output on Windows without the old
+    # encode-and-strip pass over the whole buffer
+    with open(outfile, 'w', encoding='utf-8', newline='\n') as f:
+        f.write(data)
@@ -21,11 +21,25 @@ Only supports a small subset of Markdown:
 
 import argparse
 import base64
-import io
+import functools
 import os
 import re
 import sys
 
+RE_WORD     = re.compile('[a-zA-Z0-9]+')
+RE_WRAPPED  = re.compile('\x01([0-9]+)\x02')
+# <br> and entities are protected in a single fused pass; the other inline
+# substitutions must stay as ordered passes, because regex alternation
+# priority is positional and would e.g. let a link swallow "[a `b](u)`"
+# that the code-span pass is supposed to win
+RE_PROTECT  = re.compile(r'<br\s*/?>|&(?:[a-zA-Z0-9]+|#\d+|#[xX][0-9a-fA-F]+);')
+RE_CODE     = re.compile(r'`(.*?)`')
+RE_IMAGE    = re.compile(r'!\[(.*?)\]\((.*?)\)')
+RE_LINK     = re.compile(r'\[(.*?)\]\((.*?)\)')
+RE_BOLD     = re.compile(r'\*\*(.*?)\*\*')
+RE_EM_STAR  = re.compile(r'\*(.*?)\*')
+RE_EM_UNDER = re.compile(r'\b_(.*?)_\b')
+
 def H(s):
     return s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
 
@@ -35,12 +49,31 @@ def count_and_strip_leading(s, c):
     return (s, l - len(s))
 
 def make_id(s):
-    return '-'.join(word.lower() for word in re.findall('[a-zA-Z0-9]+', s))
+    return '-'.join(word.lower() for word in RE_WORD.findall(s))
+
+SEPARATOR_CHARS = frozenset('-:')  # what a table separator cell consists of
+
+@functools.lru_cache(maxsize=256)
+def tag_stem(tag):
+    """tag name without attributes, e.g. 'h2 id=\"foo\"' -> 'h2'"""
+    return tag.partition(' ')[0]
+
+CONTENT_TYPES = {
+    "jpg":  "image/jpeg",
+    "jpeg": "image/jpeg",
+    "png":  "image/png",
+    "svg":  "image/svg+xml",
+}
+
+@functools.lru_cache(maxsize=64)
+def load_asset(path):
+    """read an embeddable asset, caching repeated references to the same file"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except EnvironmentError:
+        return None
 
-def wrap(s):
-    return ''.join(f"\x01{ord(c):X}" for c in s) + '\x02'
-def unwrap(s):
-    return re.sub('\x01([0-9A-F]+)', lambda m: chr(int(m.group(1),16)), s).replace('\x02', '')
 
 ###############################################################################
 
@@ -99,18 +132,41 @@ class MarkdownToHTML:
         self.title = title
         self.excludes = set(map(make_id, excludes))
         self.basedir = basedir or ""
-        self.html = io.StringIO()
+        self.html = []  # output fragments, joined in get_html()
         self.current_stack = []
         self.para_stack = []
         self.enum_indent_stack = []
-        self.para = ""
+        self.para = []  # list of fragments, joined on flush
         self.indent = 0
         self.auto_close = True
         self.table_header = True
         self.skip = 0
+        self.protected = []
+
+    def wrap(self, s):
+        # park a finished fragment in the protected table so the following
+        # substitution passes can't touch it; unwrap() puts it back
+        self.protected.append(s)
+        return f"\x01{len(self.protected) - 1}\x02"
+
+    def unwrap(self, s):
+        # a fragment may legitimately contain placeholders of *earlier*
+        # fragments (e.g. an entity inside a code span), so resolve the table
+        # front to back and then run a single pass over the line; forged
+        # placeholder-shaped sequences in the source text can reference
+        # anything, but same/forward references simply stay literal text
+        # instead of looping or crashing
+        resolved = []
+        def resolve(m):
+            i = int(m.group(1))
+            return resolved[i] if (i < len(resolved)) else m.group(0)
+        for fragment in self.protected:
+            resolved.append(RE_WRAPPED.sub(resolve, fragment))
+        self.protected = []
+        return RE_WRAPPED.sub(resolve, s)
 
     def in_tag(self, tag):
-        return self.para_stack and (self.para_stack[-1].split()[0] == tag)
+        return self.para_stack and (tag_stem(self.para_stack[-1]) == tag)
 
     def feed(self, line):
         """feed a single line of text, or a file-like object"""
@@ -122,7 +178,7 @@ class MarkdownToHTML:
         rawline = line.rstrip()
         if not rawline:
             if self.in_tag("pre"):
-                self.para += "\n"
+                self.para.append("\n")
             else:
                 self.flush([])
                 self.indent = 0
@@ -132,29 +188,30 @@ class MarkdownToHTML:
         indent = len(rawline)
         line = rawline.lstrip()
         indent -= len(line)
-        bullet = line.startswith("- ")
+        bullet = (line[:2] == "- ")
         if bullet:
             line = line[1:].lstrip()
             indent += 2
+        first = line[:1]  # classify the line kind on its first character
 
         if self.para and not(bullet) and (indent >= self.indent):
             # add to existing paragraph
             if self.in_tag('pre'):
-                self.para += "\n" + rawline[4:]
-            elif self.para.endswith('-') or not(self.para):
-                self.para += line
+                self.para.append("\n" + rawline[4:])
+            elif self.para[-1].endswith('-'):
+                self.para.append(line)
             else:
-                self.para += " " + line
+                self.para.append(" " + line)
         elif bullet:
             # start enumeration
             self.enum_indent_stack = [i for i in self.enum_indent_stack if (i < indent)] + [indent]
-            depth = len(self.enum_indent_stack)
-            self.flush(['ul','li'] * (depth - 1) + ['ul'])  # ensure closing the previous item
-            self.new_para(['ul','li'] * depth, line, indent, auto_close=False)
+            stack = ['ul','li'] * len(self.enum_indent_stack)
+            self.flush(stack[:-1])  # ensure closing the previous item
+            self.new_para(stack, line, indent, auto_close=False)
         elif indent >= 4:
             # start preformatted text
             self.new_para(['pre'], rawline[4:], indent)
-        elif not(indent) and line.startswith('#'):
+        elif not(indent) and (first == '#'):
             # heading
             line, level = count_and_strip_leading(line, '#')
             self.flush([])
@@ -163,13 +220,13 @@ class MarkdownToHTML:
             if not(self.skip) or (level <= self.skip):
                 self.skip = level if (hid in self.excludes) else 0
             self.new_para([f'h{level} id="{hid}"'], line.strip())
-        elif not(indent) and line.startswith('|'):
+        elif not(indent) and (first == '|'):
             # table row
             td = 'th' if self.table_header else 'td'
             self.table_header = False
             cols = list(map(str.strip, line[1:].split('|')))
             if not cols[-1]: cols.pop()
-            if any(c.strip('-:') for c in cols):
+            if not all(map(SEPARATOR_CHARS.issuperset, cols)):
                 for c in cols:
                     self.new_para(['table', 'tr', td], c, 0)
                 self.flush(['table'])  # force-close row
@@ -179,80 +236,86 @@ class MarkdownToHTML:
 
     def new_para(self, target_stack, content, indent=0, auto_close=True):
         self.flush(target_stack)
-        self.para = content
+        self.para = [content] if content else []
         self.indent = indent
         self.auto_close = auto_close
 
     def flush(self, target_stack=None):
         if target_stack is None:
             target_stack = self.para_stack
+        if not(self.para) and (self.current_stack == target_stack):
+            # no pending content and no tags to open or close
+            self.para_stack = target_stack
+            self.auto_close = True
+            return
         if not self.skip:
             ended = False
             if self.para:
+                para = ''.join(self.para)
                 if self.in_tag("pre"):
-                    self.html.write(H(self.para.rstrip()))
+                    self.html.append(H(para.rstrip()))
                 else:
-                    self.html.write(self.format_line(self.para))
+                    self.html.append(self.format_line(para))
                 ended = self.auto_close and self.current_stack_pop()
-            while self.current_stack and ((len(self.current_stack) > len(target_stack)) or (self.current_stack != target_stack[:len(self.current_stack)])):
+            # determine the common prefix of the open tag stack and the
+            # target once, then close down to it and open the remainder
+            keep = 0
+            while (keep < len(self.current_stack)) and (keep < len(target_stack)) \
+              and (self.current_stack[keep] == target_stack[keep]):
+                keep += 1
+            while len(self.current_stack) > keep:
                 ended = self.current_stack_pop() or ended
             if ended:
-                self.html.write('\n')
-            while self.current_stack < target_stack:
-                tag = target_stack[len(self.current_stack)]
-                self.html.write(f'<{tag}>')
+                self.html.append('\n')
+            for tag in target_stack[keep:]:
+                self.html.append(f'<{tag}>')
                 self.current_stack.append(tag)
-        self.para = ""
+        self.para = []
         self.para_stack = target_stack
         self.auto_close = True
 
     def current_stack_pop(self):
         if not self.current_stack: return False
-        tag = self.current_stack.pop().split()[0]
-        self.html.write(f'</{tag}>')
+        self.html.append(f'</{tag_stem(self.current_stack.pop())}>')
         return True
 
     def format_line(self, line):
-        line = re.sub(r'<br\s*/?>', wrap("<br>"), line)
-        line = re.sub(r'&([a-zA-Z0-9]+|#\d+|#[xX][0-9a-fA-F]+);', lambda m: wrap(m.group(0)), line)
+        # fast path: a line without any markup metacharacter only needs
+        # HTML escaping, not the whole wrap/substitute/unwrap machinery
+        if not any(c in line for c in '`*_[<&'):
+            return H(line)
+        line = RE_PROTECT.sub(lambda m: self.wrap("<br>" if (m.group(0)[0] == '<') else m.group(0)), line)
         line = H(line)
-        line = re.sub(r'`(.*?)`', lambda m: '<code>' + wrap(m.group(1)) + '</code>', line)
-        line = re.sub(r'!\[(.*?)\]\((.*?)\)', lambda m: self.embed_image(m.group(2), m.group(1)), line)
-        line = re.sub(r'\[(.*?)\]\((.*?)\)', lambda m: f'<a href="{wrap(m.group(2))}">{m.group(1)}</a>', line)
-        line = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', line)
-        line = re.sub(r'\*(.*?)\*', r'<em>\1</em>', line)
-        line = re.sub(r'\b_(.*?)_\b', r'<em>\1</em>', line)
-        return unwrap(line)
+        line = RE_CODE.sub(lambda m: '<code>' + self.wrap(m.group(1)) + '</code>', line)
+        line = RE_IMAGE.sub(lambda m: self.embed_image(m.group(2), m.group(1)), line)
+        line = RE_LINK.sub(lambda m: f'<a href="{self.wrap(m.group(2))}">{m.group(1)}</a>', line)
+        line = RE_BOLD.sub(r'<strong>\1</strong>', line)
+        line = RE_EM_STAR.sub(r'<em>\1</em>', line)
+        line = RE_EM_UNDER.sub(r'<em>\1</em>', line)
+        return self.unwrap(line)
 
     def embed_image(self, uri, alt=None):
         data = None
-        try:
-            if not uri.startswith(("http://", "https://", "/")):
-                with open(os.path.join(self.basedir, uri), 'rb') as f:
-                    data = f.read()
-        except EnvironmentError:
-            pass
-        alt = f' alt="{wrap(alt)}"' if alt else ''
-        ext = os.path.splitext(uri)[-1].strip('.').lower()
-        ctype = {
-            "jpg":  "image/jpeg",
-            "jpeg": "image/jpeg",
-            "png":  "image/png",
-            "svg":  "image/svg+xml",
-        }.get(ext)
+        if not uri.startswith(("http://", "https://", "/")):
+            data = load_asset(os.path.join(self.basedir, uri))
+        alt = f' alt="{self.wrap(alt)}"' if alt else ''
+        ext = uri.rpartition('.')[2].lower()
+        ctype = CONTENT_TYPES.get(ext)
+        # the finished tags are returned wrapped, so the remaining inline
+        # passes scan a tiny placeholder instead of the whole data URI
         if data and (ext == "svg"):
             data = data.decode('utf-8', 'replace').strip()
             data = data.replace('\n', ' ').replace('\r', '').replace('\t', ' ')
             data = data.replace('%', '%25').replace('"', '%22').replace('<', '%3C').replace('>', '%3E').replace(' ', '%20')
-            return f'<img{alt} src="data:{ctype};utf8,{data}">'
+            return self.wrap(f'<img{alt} src="data:{ctype};utf8,{data}">')
         if data and ctype:
-            return f'<img{alt} src="data:{ctype};base64,{base64.b64encode(data).decode()}">'
+            return self.wrap(f'<img{alt} src="data:{ctype};base64,{base64.b64encode(data).decode()}">')
         # fall back to normal <img> tag referencing an external image
-        return f'<img src="{wrap(uri)}"{alt}>'
+        return self.wrap(f'<img src="{self.wrap(uri)}"{alt}>')
 
     def get_html(self):
         self.flush([])
-        return HTMLHeader.replace("$TITLE", self.title) + self.html.getvalue().strip() + HTMLFooter
+        return HTMLHeader.replace("$TITLE", self.title) + ''.join(self.html).strip() + HTMLFooter
 
 ###############################################################################
 
@@ -275,8 +338,9 @@ if __name__ == "__main__":
     conv = MarkdownToHTML(title=args.title, excludes=args.exclude or [], basedir=os.path.dirname(infile))
 
     try:
+        # read and decode the whole file once; splitlines is a single C pass
         with open(infile, encoding='utf-8', errors='replace') as md:
-            conv.feed(md)
+            conv.feed(md.read().splitlines())
     except EnvironmentError as e:
         print(f"ERROR: could not read input file '{infile}' - {e}", file=sys.stderr)
         sys.exit(1)
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+# SPDX-FileCopyrightText: 2024 Martin J. Fiedler <keyj@emphy.de>
+# SPDX-License-Identifier: MIT
+"""Shared helper for embedding binary blobs as C/C++ array initializers."""
+
+MAX_LINE = 254
+
+def hex_array_body(data):
+    """format a byte blob as the body of a C array initializer,
+    one indented line of '0xNN,' items per <=MAX_LINE columns"""
+    hexed = "0x" + data.hex(',').upper().replace(",", ",0x")
+    step = 5 * ((MAX_LINE - 4) // 5)  # 5 characters per byte, 4 columns indent
+    return "\n    " + ",\n    ".join(hexed[pos : pos + step - 1] for pos in range(0, len(hexed), step))